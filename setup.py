@@ -31,6 +31,9 @@ setup(
     },
     install_requires=[
         "python-dotenv",
+        "isal",
+        "httpx[http2]",
+        "aiofiles",
     ],
     author="Cemali Altuntas",
     author_email="cemali@yildiz.edu.tr",
@@ -43,7 +46,7 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.8",
     entry_points={
         "console_scripts": [
             "cddis-download=cddis_downloader.downloader:main",
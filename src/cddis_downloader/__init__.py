@@ -1,3 +1,4 @@
 from .downloader import CDDISFTPClient, main
+from .https_client import CDDISHTTPSClient
 
-__all__ = ['CDDISFTPClient', 'main'] 
\ No newline at end of file
+__all__ = ['CDDISFTPClient', 'CDDISHTTPSClient', 'main'] 
\ No newline at end of file
@@ -1,18 +1,57 @@
+import multiprocessing
 import os
-import gzip
+import queue
 import shutil
+import ssl
 import subprocess
-from ftplib import FTP_TLS
-from typing import List, Optional
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import partial
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from ftplib import FTP_TLS, error_perm
+from typing import Callable, List, Optional
 from pathlib import Path
-from .utils import check_crx2rnx, get_crx2rnx_path
+from .https_client import CDDISHTTPSClient, EarthdataAuthError
+from .utils import (check_crx2rnx, delete_later, flush_deletions, get_crx2rnx_path,
+                    get_earthdata_token)
 import time
 
+try:
+    from isal import igzip as gzip_mod  # ISA-L accelerated, API compatible with gzip
+except ImportError:
+    import gzip as gzip_mod
+
+try:
+    import rapidgzip  # Optional parallel decompressor for large files
+except ImportError:
+    rapidgzip = None
+
+DEFAULT_PARALLEL_DOWNLOADS = 4
+DOWNLOAD_QUEUE_SIZE = 64
+LIST_BLOCK_SIZE = 64 * 1024  # Socket read size for directory listings
+WRITE_BUFFER_SIZE = 1024 * 1024  # Receive buffer for FTP transfers, written to disk when full
+GZIP_BUFFER_SIZE = 128 * 1024  # Read/copy chunk for decompression, same as gzip.READ_BUFFER_SIZE
+RAPIDGZIP_MIN_SIZE = 10 * 1024 * 1024  # Smaller files do not amortize rapidgzip's thread startup
+EXTRACT_THREADS_PER_WORKER = 4  # Cores per extraction process, used by rapidgzip
+
+# Zero-padded DOY and hour strings, built once at import time
+_DOY_STRS = tuple(f"{i:03d}" for i in range(1, 367))
+_HOUR_STRS = tuple(f"{i:02d}" for i in range(0, 24))
+
+def write_all(fp, data: memoryview) -> None:
+    """Writes all of data to an unbuffered file, continuing after short writes."""
+    while data:
+        written = fp.write(data)
+        data = data[written:]
+
 class CDDISFTPClient:
     """CDDIS FTP client for downloading GNSS data."""
     
     def __init__(self):
         self.ftp = None
+        self._cwd = None  # Last directory changed into on the current connection
+        self._type = None  # Last transfer type set on the current connection
 
     def connect(self) -> bool:
         """Establishes FTP connection to CDDIS server."""
@@ -23,6 +62,8 @@ class CDDISFTPClient:
                 except:
                     pass
                 self.ftp = None
+            self._cwd = None
+            self._type = None
                 
             self.ftp = FTP_TLS('gdc.cddis.eosdis.nasa.gov')
             self.ftp.connect(timeout=30)  # 30 saniyelik timeout ekleyelim
@@ -35,20 +76,52 @@ class CDDISFTPClient:
             self.ftp = None
             return False
 
+    def change_dir(self, path: str) -> None:
+        """Changes the remote directory, skipping the CWD round trip if already there."""
+        if self._cwd != path:
+            self.ftp.cwd(path)
+            self._cwd = path
+
+    def set_type(self, transfer_type: str) -> None:
+        """Sets the transfer type ('A' or 'I'), skipping the TYPE round trip if unchanged."""
+        if self._type != transfer_type:
+            self.ftp.voidcmd(f'TYPE {transfer_type}')
+            self._type = transfer_type
+
+    def list_names(self) -> List[str]:
+        """Lists the current directory with NLST, reading the reply in one bulk pass."""
+        self.set_type('A')
+        chunks = []
+        with self.ftp.transfercmd('NLST') as conn:
+            while True:
+                chunk = conn.recv(LIST_BLOCK_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            if isinstance(conn, ssl.SSLSocket):
+                conn.unwrap()
+        self.ftp.voidresp()
+        return b''.join(chunks).decode(self.ftp.encoding).splitlines()
+
     def list_hour_subfolders(self, base_path: str) -> List[str]:
         """Lists hour-based subdirectories."""
-        if not self.ftp:
-            return []
-        
-        try:
-            self.ftp.cwd(base_path)
-            folders = []
-            self.ftp.retrlines('LIST', lambda x: folders.append(x.split()[-1]))
-            hour_folders = [f for f in folders if f.isdigit() and len(f) == 2]
-            return sorted(hour_folders)
-        except Exception as e:
-            print(f"Error listing hour subfolders: {e}")
-            return []
+        # A second attempt covers a connection that timed out while idle between DOYs
+        for attempt in range(2):
+            if not self.ftp and not self.reconnect():
+                return []
+
+            try:
+                self.change_dir(base_path)
+                folders = self.list_names()
+                hour_folders = [f for f in folders if f.isdigit() and len(f) == 2]
+                return sorted(hour_folders)
+            except error_perm as e:
+                print(f"Error listing hour subfolders: {e}")
+                return []
+            except Exception as e:
+                print(f"Error listing hour subfolders: {e}")
+                self.close()
+        return []
 
     def list_crx_files(self, base_path: str, hour_subdir: str, 
                       station_filter: Optional[str] = None) -> List[str]:
@@ -63,15 +136,12 @@ class CDDISFTPClient:
                 
             try:
                 full_path = f"{base_path}/{hour_subdir}"
-                self.ftp.cwd(full_path)
-                files = []
-                self.ftp.retrlines('LIST', lambda x: files.append(x.split()[-1]))
-                
-                crx_files = [f for f in files if f.endswith('.crx.gz')]
-                if station_filter:
-                    crx_files = [f for f in crx_files if f.startswith(station_filter)]
+                self.change_dir(full_path)
+                files = self.list_names()
                 
-                return sorted(crx_files)
+                prefix = station_filter or ''
+                return sorted(f for f in files
+                              if f.endswith('.crx.gz') and f.startswith(prefix))
             except Exception as e:
                 print(f"Error listing .crx.gz files: {e}")
                 retry_count += 1
@@ -88,6 +158,10 @@ class CDDISFTPClient:
     def download_file(self, base_path: str, hour_subdir: str, 
                      filename: str, local_path: str) -> bool:
         """Downloads a single file from FTP to local path."""
+        return self.download_file_in_dir(f"{base_path}/{hour_subdir}", filename, local_path)
+
+    def download_file_in_dir(self, remote_dir: str, filename: str, local_path: str) -> bool:
+        """Downloads a single file from an already joined remote directory path."""
         max_retries = 3
         retry_count = 0
         
@@ -97,17 +171,62 @@ class CDDISFTPClient:
                     return False
                 
             try:
-                full_path = f"{base_path}/{hour_subdir}"
-                self.ftp.cwd(full_path)
-                
-                with open(local_path, 'wb') as fp:
-                    self.ftp.retrbinary(f'RETR {filename}', fp.write)
+                self.change_dir(remote_dir)
+
+                # Compare with the remote size to skip or resume earlier partial downloads
+                self.set_type('I')  # SIZE reports byte counts in binary mode
+                try:
+                    remote_size = self.ftp.size(filename)
+                except error_perm:
+                    remote_size = None
+                local_size = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+                if remote_size is not None and local_size == remote_size:
+                    print(f"Already downloaded: {filename}")
+                    return True
+                if remote_size is None or local_size > remote_size:
+                    local_size = 0
+                elif local_size:
+                    print(f"Resuming {filename} from byte {local_size}")
+
+                # Receive straight into a preallocated buffer and write it out
+                # once full, so no bytes object is created per received block
+                buf = bytearray(WRITE_BUFFER_SIZE)
+                view = memoryview(buf)
+                filled = 0
+                try:
+                    conn = self.ftp.transfercmd(f'RETR {filename}', local_size or None)
+                except error_perm as e:
+                    if not local_size:
+                        raise
+                    # The server rejected REST, download the whole file again
+                    print(f"Cannot resume {filename} ({e}), downloading from the start")
+                    local_size = 0
+                    conn = self.ftp.transfercmd(f'RETR {filename}')
+                with conn, open(local_path, 'ab' if local_size else 'wb', buffering=0) as fp:
+                    while True:
+                        received = conn.recv_into(view[filled:])
+                        if not received:
+                            break
+                        filled += received
+                        if filled == len(buf):
+                            write_all(fp, view)
+                            filled = 0
+                    if filled:
+                        write_all(fp, view[:filled])
+                    if isinstance(conn, ssl.SSLSocket):
+                        conn.unwrap()
+                self.ftp.voidresp()
+
+                if remote_size is not None:
+                    downloaded_size = os.path.getsize(local_path)
+                    if downloaded_size != remote_size:
+                        raise OSError(f"size mismatch, expected {remote_size} bytes "
+                                      f"but got {downloaded_size}")
                 print(f"Downloaded: {filename}")
                 return True
             except Exception as e:
+                # Keep the partial file, the next attempt resumes from it
                 print(f"Error downloading {filename}: {e}")
-                if os.path.exists(local_path):
-                    os.remove(local_path)
                 retry_count += 1
                 if retry_count < max_retries:
                     print(f"Attempting to reconnect (attempt {retry_count + 1}/{max_retries})...")
@@ -128,52 +247,14 @@ class CDDISFTPClient:
                 print(f"Warning: Error while closing FTP connection: {e}")
             finally:
                 self.ftp = None
+                self._cwd = None
+                self._type = None
 
     def extract_and_convert(self, file_path: str, convert_to_rnx: bool = False) -> None:
         """
         Extracts .gz file and optionally converts .crx to .rnx using CRX2RNX
         """
-        file_path = Path(file_path)
-        
-        # First extract .gz
-        crx_path = file_path.with_suffix('')  # Removes .gz extension
-        try:
-            with gzip.open(file_path, 'rb') as f_in:
-                with open(crx_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            print(f"Extracted: {crx_path.name}")
-            
-            # Remove original .gz file
-            file_path.unlink()
-            
-            # Convert to RNX if requested
-            if convert_to_rnx:
-                # Construct output .rnx filename
-                rnx_path = crx_path.with_suffix('.rnx')
-                
-                # Run CRX2RNX using local executable
-                try:
-                    crx2rnx_path = get_crx2rnx_path()
-                    if not crx2rnx_path.exists():
-                        print(f"Error: CRX2RNX not found at {crx2rnx_path}")
-                        return
-                        
-                    result = subprocess.run(
-                        [str(crx2rnx_path), str(crx_path)],
-                        capture_output=True,
-                        text=True,
-                        check=True
-                    )
-                    print(f"Converted to RNX: {rnx_path.name}")
-                    
-                    # Remove .crx file after successful conversion
-                    crx_path.unlink()
-                    
-                except subprocess.CalledProcessError as e:
-                    print(f"Error converting {crx_path.name} to RNX: {e.stderr}")
-                    
-        except Exception as e:
-            print(f"Error extracting/converting {file_path.name}: {e}")
+        extract_and_convert(file_path, convert_to_rnx)
 
     def reconnect(self) -> bool:
         """Attempts to reconnect to the FTP server."""
@@ -199,6 +280,200 @@ class CDDISFTPClient:
         print("All reconnection attempts failed")
         return False
 
+def fadvise(fd: int, advice: str) -> None:
+    """Gives the kernel an access-pattern hint for the whole file, where supported."""
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+
+@contextmanager
+def open_gzip(file_path: Path, threads: Optional[int] = None):
+    """
+    Opens a .gz file for reading with the fastest available decompressor.
+    threads caps rapidgzip's parallelism and defaults to the CPU count.
+    """
+    if rapidgzip is not None and file_path.stat().st_size >= RAPIDGZIP_MIN_SIZE:
+        with rapidgzip.open(str(file_path), parallelization=threads or os.cpu_count()) as f_in:
+            yield f_in
+    else:
+        with open(file_path, 'rb', buffering=GZIP_BUFFER_SIZE) as raw_in, \
+                gzip_mod.open(raw_in, 'rb') as f_in:
+            fadvise(raw_in.fileno(), 'POSIX_FADV_SEQUENTIAL')  # Larger readahead
+            yield f_in
+
+def pipe_to_crx2rnx(file_path: Path, rnx_path: Path, crx2rnx_path: Path,
+                    threads: Optional[int] = None) -> None:
+    """
+    Streams the decompressed CRX data through CRX2RNX into rnx_path, so no
+    intermediate .crx file is written. Raises CalledProcessError on failure.
+    """
+    try:
+        # stderr goes to a file, a pipe could fill up and deadlock against stdin
+        with open(rnx_path, 'wb') as f_out, tempfile.TemporaryFile() as f_err:
+            # Without a file argument CRX2RNX works as a filter (stdin -> stdout)
+            proc = subprocess.Popen(
+                [str(crx2rnx_path)],
+                stdin=subprocess.PIPE,
+                stdout=f_out,
+                stderr=f_err
+            )
+            try:
+                with open_gzip(file_path, threads) as f_in:
+                    shutil.copyfileobj(f_in, proc.stdin, length=GZIP_BUFFER_SIZE)
+            except BrokenPipeError:
+                pass  # CRX2RNX exited early, its return code tells why
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+                proc.wait()
+                f_err.seek(0)
+                stderr = f_err.read()
+
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(
+                proc.returncode, proc.args, stderr=stderr.decode(errors='replace'))
+    except BaseException:
+        # Do not leave a partial .rnx behind, it would be skipped on the next run
+        if rnx_path.exists():
+            rnx_path.unlink()
+        raise
+
+def extract_and_convert(file_path: str, convert_to_rnx: bool = False,
+                        remove_source: bool = True,
+                        decompression_threads: Optional[int] = None) -> bool:
+    """
+    Extracts .gz file and optionally converts .crx to .rnx using CRX2RNX.
+    Returns True on success.
+
+    Defined at module level so it can be submitted to a ProcessPoolExecutor.
+    Pool callers pass remove_source=False and remove the .gz themselves, since
+    a pool worker may exit before its background deletions have run.
+    decompression_threads limits rapidgzip so pooled calls share the cores.
+    """
+    file_path = Path(file_path)
+    crx_path = file_path.with_suffix('')  # Removes .gz extension
+    try:
+        if convert_to_rnx:
+            # Construct output .rnx filename
+            rnx_path = crx_path.with_suffix('.rnx')
+
+            # Run CRX2RNX using local executable
+            try:
+                crx2rnx_path = get_crx2rnx_path()
+                if not crx2rnx_path.exists():
+                    print(f"Error: CRX2RNX not found at {crx2rnx_path}")
+                    return False
+
+                pipe_to_crx2rnx(file_path, rnx_path, crx2rnx_path,
+                                decompression_threads)
+                print(f"Converted to RNX: {rnx_path.name}")
+
+            except subprocess.CalledProcessError as e:
+                print(f"Error converting {crx_path.name} to RNX: {e.stderr}")
+                return False
+        else:
+            with open_gzip(file_path, decompression_threads) as f_in:
+                with open(crx_path, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out, length=GZIP_BUFFER_SIZE)
+            print(f"Extracted: {crx_path.name}")
+
+        # Remove original .gz file
+        if remove_source:
+            delete_later(file_path)
+        return True
+
+    except Exception as e:
+        print(f"Error extracting/converting {file_path.name}: {e}")
+        return False
+
+def remove_if_extracted(file_path: str, future: Future) -> None:
+    """Done-callback for pooled extract_and_convert calls: queues the .gz for removal."""
+    if not future.cancelled() and future.exception() is None and future.result():
+        delete_later(file_path)
+
+class FTPClientPool:
+    """Hands out one CDDISFTPClient per worker thread, since FTP_TLS is not thread-safe."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._clients = []
+        self._lock = threading.Lock()
+
+    def get(self) -> CDDISFTPClient:
+        """Returns the calling thread's client, connecting it on first use."""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = CDDISFTPClient()
+            client.connect()  # download_file reconnects if this fails
+            self._local.client = client
+            with self._lock:
+                self._clients.append(client)
+        return client
+
+    def close_all(self):
+        """Closes every client handed out by this pool."""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+
+def download_worker(client_pool: FTPClientPool, jobs: queue.Queue,
+                    on_downloaded: Callable[[str], None]) -> bool:
+    """Downloads queued files on this thread's own FTP session until a None sentinel arrives."""
+    success = True
+    while True:
+        job = jobs.get()
+        if job is None:
+            return success
+
+        remote_dir, file_name, local_path = job
+        try:
+            client = client_pool.get()
+            if client.download_file_in_dir(remote_dir, file_name, local_path):
+                on_downloaded(local_path)
+            else:
+                success = False
+        except Exception as e:
+            print(f"Error processing {file_name}: {e}")
+            success = False
+
+def queue_hour_files(client: CDDISFTPClient, jobs: queue.Queue, base_path: str,
+                     hour_subdir: str, download_dir: str, station: str) -> bool:
+    """Lists one hour directory and queues files that are not yet available locally."""
+    try:
+        crx_files = client.list_crx_files(base_path, hour_subdir, 
+                                        station_filter=station if station else None)
+        if not crx_files:
+            print(f"No .crx.gz files found in {base_path}/{hour_subdir} "
+                  f"(filter={station or 'None'})")
+            return True
+
+        remote_dir = f"{base_path}/{hour_subdir}"
+        local_hour_dir = os.path.join(download_dir, hour_subdir)
+        os.makedirs(local_hour_dir, exist_ok=True)
+
+        for file_name in crx_files:
+            local_path = os.path.join(local_hour_dir, file_name)
+            # Eğer .rnx dosyası zaten varsa, bu dosyayı atla
+            rnx_path = local_path.replace('.crx.gz', '.rnx')
+            if os.path.exists(rnx_path):
+                print(f"Skipping {file_name} - RINEX file already exists: {os.path.basename(rnx_path)}")
+                continue
+                
+            # Eğer .crx dosyası varsa, onu da kontrol et
+            crx_path = local_path.replace('.gz', '')
+            if os.path.exists(crx_path):
+                print(f"Skipping {file_name} - CRX file already exists: {os.path.basename(crx_path)}")
+                continue
+
+            jobs.put((remote_dir, file_name, local_path))
+        return True
+
+    except Exception as e:
+        print(f"Error processing hour {hour_subdir}: {e}")
+        return False
+
 def check_crx2rnx_availability() -> bool:
     """Checks if CRX2RNX is available for use."""
     if not check_crx2rnx():
@@ -227,10 +502,11 @@ def validate_range(value: str, min_val: int, max_val: int, name: str) -> List[st
             print(f"{name} must be between {min_val:02d}-{max_val:02d}.")
             return []
             
-        # Generate list of values with leading zeros
-        # Use 3 digits for DOY, 2 digits for others
+        # Slice the precomputed zero-padded tables (3 digits for DOY, 2 for hours)
         if name == "DOY":
-            return [f"{i:03d}" for i in range(start, end + 1)]
+            return list(_DOY_STRS[start - 1:end])
+        elif name == "hour":
+            return list(_HOUR_STRS[start:end + 1])
         else:
             return [f"{i:02d}" for i in range(start, end + 1)]
         
@@ -254,6 +530,7 @@ def main():
     doy_input = input("Enter DOY (e.g., 001 or 001-030): ").strip()
     subfolder = input("Enter subfolder (e.g., 24d, 24o): ").strip()
     hour_input = input("Enter hour (e.g., 00 or 00-05) or press Enter for ALL: ").strip()
+    parallel_input = input(f"Enter number of parallel downloads (default {DEFAULT_PARALLEL_DOWNLOADS}): ").strip()
     
     # Ask for extraction preferences
     extract_files = input("Extract downloaded files? (y/N): ").strip().lower() == 'y'
@@ -274,103 +551,150 @@ def main():
     if hour_input and not hour_list:  # Only fail if hour was provided but invalid
         return
 
-    # Process each DOY
-    doy_index = 0
-    while doy_index < len(doy_list):
-        doy = doy_list[doy_index]
-        print(f"\nProcessing DOY: {doy}")
-        
-        # 3. Connect to FTP if needed
-        client = CDDISFTPClient()
-        if not client.connect():
-            print("FTP connection failed. Waiting 30 seconds before retry...")
-            time.sleep(30)
-            continue
+    # Validate parallel download count
+    try:
+        parallel = int(parallel_input) if parallel_input else DEFAULT_PARALLEL_DOWNLOADS
+    except ValueError:
+        parallel = 0
+    if parallel < 1:
+        print("Number of parallel downloads must be a positive integer.")
+        return
 
-        try:
-            # 4. Construct base path on FTP
-            base_path = f"/gnss/data/highrate/{year}/{doy}/{subfolder}"
-
-            # 5. List and validate available hours
-            available_hours = client.list_hour_subfolders(base_path)
-            if not available_hours:
-                print(f"No hour subfolders found in {base_path}")
-                doy_index += 1  # Move to next DOY
-                continue
+    # Download over HTTPS when an Earthdata token is configured, otherwise over FTPS.
+    # A rejected token switches the remaining downloads to FTPS.
+    token = get_earthdata_token()
+    https_client = CDDISHTTPSClient(token, max_concurrent=parallel) if token else None
+    if https_client:
+        print(f"Earthdata token found, files will be downloaded over HTTPS "
+              f"({parallel} concurrent requests).")
+
+    # Extraction and conversion are CPU-bound, so they run on separate processes.
+    # Each worker gets EXTRACT_THREADS_PER_WORKER cores for rapidgzip, so all
+    # workers decompressing large files at once still fit on the CPUs. Workers
+    # are spawned rather than forked, since the first submit comes from a download thread.
+    cpu_count = os.cpu_count() or 1
+    extract_workers = min(max(1, cpu_count // EXTRACT_THREADS_PER_WORKER), 61)  # Windows limit
+    decompression_threads = cpu_count // extract_workers
+    extract_pool = None
+    if extract_files:
+        extract_pool = ProcessPoolExecutor(max_workers=extract_workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+
+    # One listing session and one pool of download sessions serve every DOY
+    client = CDDISFTPClient()
+    client_pool = FTPClientPool()
+    executor = ThreadPoolExecutor(max_workers=parallel)
 
-            # 6. Filter hours based on user input
-            hour_folders = hour_list if hour_list else available_hours
-            valid_hours = [h for h in hour_folders if h in available_hours]
+    try:
+        # Process each DOY
+        doy_index = 0
+        while doy_index < len(doy_list):
+            doy = doy_list[doy_index]
+            print(f"\nProcessing DOY: {doy}")
             
-            if not valid_hours:
-                print(f"No valid hours found in available hours: {available_hours}")
-                doy_index += 1  # Move to next DOY
+            # 3. Connect to FTP if needed
+            if not client.ftp and not client.connect():
+                print("FTP connection failed. Waiting 30 seconds before retry...")
+                time.sleep(30)
                 continue
 
-            # 7. Prepare download directory
-            station_folder = station if station else "ALLSTATIONS"
-            download_dir = os.path.join("downloads", station_folder, year, doy)
-            os.makedirs(download_dir, exist_ok=True)
-            
-            print(f"Processing hours: {valid_hours}")
-            print(f"Files will be saved to: {download_dir}\n")
+            try:
+                # 4. Construct base path on FTP
+                base_path = f"/gnss/data/highrate/{year}/{doy}/{subfolder}"
+
+                # 5. List and validate available hours
+                available_hours = client.list_hour_subfolders(base_path)
+                if not available_hours:
+                    print(f"No hour subfolders found in {base_path}")
+                    doy_index += 1  # Move to next DOY
+                    continue
+
+                # 6. Filter hours based on user input
+                hour_folders = hour_list if hour_list else available_hours
+                available = frozenset(available_hours)
+                valid_hours = [h for h in hour_folders if h in available]
+                
+                if not valid_hours:
+                    print(f"No valid hours found in available hours: {available_hours}")
+                    doy_index += 1  # Move to next DOY
+                    continue
+
+                # 7. Prepare download directory
+                station_folder = station if station else "ALLSTATIONS"
+                download_dir = os.path.join("downloads", station_folder, year, doy)
+                os.makedirs(download_dir, exist_ok=True)
+                
+                print(f"Processing hours: {valid_hours}")
+                print(f"Files will be saved to: {download_dir}\n")
+
+                # 8. List files while parallel sessions download them
+                jobs = queue.Queue(maxsize=DOWNLOAD_QUEUE_SIZE)
+                extract_futures = []
+                success = True
+
+                def on_downloaded(local_path: str) -> None:
+                    if extract_pool is not None:
+                        future = extract_pool.submit(
+                            extract_and_convert, local_path, convert_to_rnx, False,
+                            decompression_threads)
+                        future.add_done_callback(partial(remove_if_extracted, local_path))
+                        extract_futures.append(future)
 
-            # 8. Download files
-            success = True
-            for hour_subdir in valid_hours:
                 try:
-                    crx_files = client.list_crx_files(base_path, hour_subdir, 
-                                                    station_filter=station if station else None)
-                    if not crx_files:
-                        print(f"No .crx.gz files found in {base_path}/{hour_subdir} "
-                              f"(filter={station or 'None'})")
-                        continue
-
-                    local_hour_dir = os.path.join(download_dir, hour_subdir)
-                    os.makedirs(local_hour_dir, exist_ok=True)
-
-                    for file_name in crx_files:
-                        local_path = os.path.join(local_hour_dir, file_name)
-                        # Eğer .rnx dosyası zaten varsa, bu dosyayı atla
-                        rnx_path = local_path.replace('.crx.gz', '.rnx')
-                        if os.path.exists(rnx_path):
-                            print(f"Skipping {file_name} - RINEX file already exists: {os.path.basename(rnx_path)}")
-                            continue
-                            
-                        # Eğer .crx dosyası varsa, onu da kontrol et
-                        crx_path = local_path.replace('.gz', '')
-                        if os.path.exists(crx_path):
-                            print(f"Skipping {file_name} - CRX file already exists: {os.path.basename(crx_path)}")
-                            continue
-
-                        if client.download_file(base_path, hour_subdir, file_name, local_path):
-                            if extract_files:
-                                client.extract_and_convert(local_path, convert_to_rnx)
-                        else:
+                    if https_client:
+                        futures = [executor.submit(https_client.download_queue, jobs, on_downloaded)]
+                    else:
+                        futures = [
+                            executor.submit(download_worker, client_pool, jobs, on_downloaded)
+                            for _ in range(parallel)
+                        ]
+                    try:
+                        for hour_subdir in valid_hours:
+                            if not queue_hour_files(client, jobs, base_path, hour_subdir,
+                                                    download_dir, station):
+                                success = False
+                                break
+                    finally:
+                        # One sentinel per worker signals the end of the listing
+                        for _ in futures:
+                            jobs.put(None)
+
+                    for future in futures:
+                        try:
+                            if not future.result():
+                                success = False
+                        except EarthdataAuthError as e:
+                            print(f"{e}, falling back to FTPS downloads")
+                            https_client = None
                             success = False
-                            break
+                        except Exception as e:
+                            print(f"Download worker failed: {e}")
+                            success = False
+                finally:
+                    # Let this DOY's extractions finish before moving on
+                    wait(extract_futures)
 
-                except Exception as e:
-                    print(f"Error processing hour {hour_subdir}: {e}")
-                    success = False
-                    break
+                if success:
+                    doy_index += 1  # Move to next DOY only if current one was successful
+                else:
+                    print(f"Errors occurred while processing DOY {doy}. Will retry after 30 seconds...")
+                    time.sleep(30)
+                    client.reconnect()
+                    continue
 
-            if success:
-                doy_index += 1  # Move to next DOY only if current one was successful
-            else:
-                print(f"Errors occurred while processing DOY {doy}. Will retry after 30 seconds...")
-                client.close()
+            except Exception as e:
+                print(f"Error processing DOY {doy}: {e}")
                 time.sleep(30)
+                client.reconnect()
                 continue
 
-        except Exception as e:
-            print(f"Error processing DOY {doy}: {e}")
-            client.close()
-            time.sleep(30)
-            continue
-        
-        finally:
-            client.close()
+    finally:
+        executor.shutdown()
+        client_pool.close_all()
+        client.close()
+        if extract_pool is not None:
+            extract_pool.shutdown()
+        flush_deletions()
 
     print("\nAll operations completed.")
 
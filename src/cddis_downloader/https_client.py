@@ -0,0 +1,121 @@
+import asyncio
+import os
+import queue
+from typing import Callable, Tuple
+
+import aiofiles
+import httpx
+
+CDDIS_ARCHIVE_HOST = "cddis.nasa.gov"
+CDDIS_ARCHIVE_URL = f"https://{CDDIS_ARCHIVE_HOST}/archive"
+DEFAULT_HTTPS_CONCURRENCY = 16
+
+class EarthdataAuthError(Exception):
+    """Raised when CDDIS does not accept the Earthdata token."""
+
+class CDDISHTTPSClient:
+    """CDDIS HTTPS client that downloads many files over one HTTP/2 connection."""
+
+    def __init__(self, token: str, max_concurrent: int = DEFAULT_HTTPS_CONCURRENCY):
+        self.token = token
+        self.max_concurrent = max_concurrent
+
+    def build_url(self, remote_dir: str, filename: str) -> str:
+        """Maps an FTP archive path to its HTTPS URL."""
+        return f"{CDDIS_ARCHIVE_URL}{remote_dir}/{filename}"
+
+    def download_queue(self, jobs: queue.Queue,
+                       on_downloaded: Callable[[str], None]) -> bool:
+        """
+        Downloads (remote_dir, filename, local_path) jobs until a None
+        sentinel arrives. Returns False if any download failed, and raises
+        EarthdataAuthError if the token was rejected.
+        """
+        return asyncio.run(self._download_queue(jobs, on_downloaded))
+
+    async def _download_queue(self, jobs: queue.Queue,
+                              on_downloaded: Callable[[str], None]) -> bool:
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        tasks = []
+        finished = False
+
+        try:
+            async with httpx.AsyncClient(
+                http2=True,
+                headers={"Authorization": f"Bearer {self.token}"},
+                follow_redirects=True,
+                timeout=30,
+            ) as client:
+                while True:
+                    job = await loop.run_in_executor(None, jobs.get)
+                    if job is None:
+                        finished = True
+                        break
+                    # Waiting here keeps at most max_concurrent requests in flight
+                    await semaphore.acquire()
+                    tasks.append(asyncio.create_task(
+                        self._download_job(client, semaphore, job, on_downloaded)))
+
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            return all(results)
+        finally:
+            if not finished:
+                # This is the queue's only consumer, keep draining up to the
+                # sentinel so the producer never blocks on a full queue
+                while await loop.run_in_executor(None, jobs.get) is not None:
+                    pass
+
+    async def _download_job(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                            job: Tuple[str, str, str],
+                            on_downloaded: Callable[[str], None]) -> bool:
+        try:
+            remote_dir, filename, local_path = job
+            if await self.download_file(client, remote_dir, filename, local_path):
+                on_downloaded(local_path)
+                return True
+            return False
+        finally:
+            semaphore.release()
+
+    async def download_file(self, client: httpx.AsyncClient, remote_dir: str,
+                            filename: str, local_path: str) -> bool:
+        """Downloads a single file over HTTPS to local path."""
+        url = self.build_url(remote_dir, filename)
+        max_retries = 3
+
+        for attempt in range(max_retries):
+            try:
+                async with client.stream("GET", url) as response:
+                    if response.status_code in (401, 403):
+                        raise EarthdataAuthError(
+                            f"Earthdata token rejected (HTTP {response.status_code})")
+                    response.raise_for_status()
+                    # httpx drops the token on cross-origin redirects, so an
+                    # unauthenticated request ends on the Earthdata login page
+                    content_type = response.headers.get("content-type", "")
+                    if (response.url.host != CDDIS_ARCHIVE_HOST
+                            or content_type.startswith("text/html")):
+                        raise EarthdataAuthError(
+                            f"Earthdata token not accepted, {filename} ended at "
+                            f"{response.url} ({content_type or 'no content type'})")
+                    async with aiofiles.open(local_path, 'wb') as fp:
+                        async for chunk in response.aiter_bytes():
+                            await fp.write(chunk)
+                print(f"Downloaded: {filename}")
+                return True
+            except EarthdataAuthError:
+                raise  # Retrying with the same token cannot succeed
+            except Exception as e:
+                print(f"Error downloading {filename}: {e}")
+                if os.path.exists(local_path):
+                    os.remove(local_path)
+                if attempt + 1 < max_retries:
+                    print(f"Retrying (attempt {attempt + 2}/{max_retries})...")
+                    await asyncio.sleep(5)
+
+        print("Max retries reached")
+        return False
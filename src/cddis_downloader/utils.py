@@ -1,6 +1,11 @@
+import atexit
 import os
+import queue
 import sys
+import threading
 from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
 
 def get_crx2rnx_path() -> Path:
     """Returns the path to CRX2RNX executable."""
@@ -24,4 +29,40 @@ def check_crx2rnx() -> bool:
     if sys.platform != "win32":
         os.chmod(crx2rnx_path, 0o755)
         
-    return True 
\ No newline at end of file
+    return True 
+
+def get_earthdata_token() -> Optional[str]:
+    """Returns the NASA Earthdata token from the environment or a .env file, if set."""
+    load_dotenv()
+    token = os.environ.get("EARTHDATA_TOKEN", "").strip()
+    return token or None
+
+_delete_queue = queue.Queue()
+_delete_thread = None
+_delete_lock = threading.Lock()
+
+def _delete_worker():
+    while True:
+        path = _delete_queue.get()
+        try:
+            Path(path).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Warning: Could not remove {path}: {e}")
+        finally:
+            _delete_queue.task_done()
+
+def delete_later(path) -> None:
+    """Queues a file for removal on a background thread, off the caller's critical path."""
+    global _delete_thread
+    with _delete_lock:
+        if _delete_thread is None:
+            _delete_thread = threading.Thread(target=_delete_worker, daemon=True)
+            _delete_thread.start()
+            atexit.register(flush_deletions)
+    _delete_queue.put(path)
+
+def flush_deletions() -> None:
+    """Blocks until every queued file has been removed."""
+    _delete_queue.join()
\ No newline at end of file